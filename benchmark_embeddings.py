@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Script to benchmark the CPU embedding fallback against its default settings.
+"""
+
+import argparse
+import time
+
+from rag.document_loader import load_documents, split_documents
+from rag.cpu_embeddings import CPUEmbeddings, CPU_BACKENDS, compare_with_reference
+from rag.config import (
+    HF_EMBED_MODEL,
+    HF_BATCH_SIZE,
+    HF_NUM_WORKERS,
+    HF_THREADS_PER_WORKER,
+    HF_BACKEND,
+)
+
+
+def main():
+    """Main function to benchmark CPU embeddings."""
+    parser = argparse.ArgumentParser(description="Benchmark CPU embeddings")
+    parser.add_argument(
+        "--data_dir",
+        type=str,
+        default="./data",
+        help="Directory containing documents to embed",
+    )
+    parser.add_argument(
+        "--limit",
+        type=int,
+        default=2000,
+        help="Maximum number of chunks to embed",
+    )
+    parser.add_argument("--model", type=str, default=HF_EMBED_MODEL)
+    parser.add_argument("--batch_size", type=int, default=HF_BATCH_SIZE)
+    parser.add_argument("--num_workers", type=int, default=HF_NUM_WORKERS)
+    parser.add_argument("--threads_per_worker", type=int, default=HF_THREADS_PER_WORKER)
+    parser.add_argument("--backend", type=str, choices=CPU_BACKENDS, default=HF_BACKEND)
+    args = parser.parse_args()
+
+    chunks = split_documents(load_documents(args.data_dir))[:args.limit]
+    texts = [chunk.page_content for chunk in chunks]
+    if not texts:
+        print(f"No documents found in {args.data_dir}")
+        return
+
+    # Baseline: the fallback's previous settings, single process and unsorted
+    from langchain_community.embeddings import HuggingFaceEmbeddings
+
+    baseline = HuggingFaceEmbeddings(
+        model_name=args.model,
+        model_kwargs={"device": "cpu"},
+    )
+    start_time = time.time()
+    reference = baseline.embed_documents(texts)
+    baseline_rate = len(texts) / max(time.time() - start_time, 1e-9)
+
+    embeddings = CPUEmbeddings(
+        model_name=args.model,
+        batch_size=args.batch_size,
+        num_workers=args.num_workers,
+        threads_per_worker=args.threads_per_worker,
+        backend=args.backend,
+    )
+    # Warm up the worker pool so start-up is not counted
+    embeddings.encode(texts[:args.batch_size * embeddings.num_workers + 1])
+    start_time = time.time()
+    embeddings.encode(texts)
+    engine_rate = len(texts) / max(time.time() - start_time, 1e-9)
+
+    comparison = compare_with_reference(embeddings, texts, reference)
+    embeddings.close()
+
+    print(f"\nEmbedded {len(texts)} chunks with {args.model}")
+    print(f"Default fallback: {baseline_rate:.1f} sentences/sec")
+    print(
+        f"CPU engine ({args.backend}, {embeddings.num_workers} workers x "
+        f"{embeddings.threads_per_worker} threads, batch {args.batch_size}): "
+        f"{engine_rate:.1f} sentences/sec ({engine_rate / baseline_rate:.2f}x)"
+    )
+    print(
+        f"Min cosine vs default fallback: {comparison['min_cosine']:.6f} "
+        f"(tolerance {comparison['expected_min_cosine']}), "
+        f"max abs diff: {comparison['max_abs_diff']:.2e}"
+    )
+    if comparison["within_tolerance"]:
+        print("Vectors match the default fallback within tolerance")
+    else:
+        print("WARNING: vectors differ from the default fallback beyond tolerance")
+
+
+if __name__ == "__main__":
+    main()
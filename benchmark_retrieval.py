@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Script to compare coarse-to-fine retrieval with flat chunk search as the corpus grows.
+"""
+
+import argparse
+import time
+
+import faiss
+import numpy as np
+from tabulate import tabulate
+
+from rag.hierarchy import DocumentIndex
+from rag.config import TOP_K_RETRIEVAL
+
+
+def make_corpus(num_docs, chunks_per_doc, dim, rng):
+    """
+    Generate a synthetic corpus of clustered chunk embeddings.
+
+    Chunks of the same document lie around a shared document vector, as
+    chunks of one source file do in a real index.
+
+    Returns:
+        Tuple of chunk vectors and the source of each chunk.
+    """
+    doc_vectors = rng.standard_normal((num_docs, dim)).astype(np.float32)
+    sources = np.repeat(np.arange(num_docs), chunks_per_doc)
+    noise = rng.standard_normal((len(sources), dim)).astype(np.float32)
+    vectors = doc_vectors[sources] + 0.6 * noise
+    return vectors, [str(source) for source in sources]
+
+
+def time_queries(search, queries):
+    """Run a search function over each query, returning results and ms per query."""
+    start_time = time.perf_counter()
+    results = [search(query[None, :]) for query in queries]
+    elapsed = time.perf_counter() - start_time
+    return results, elapsed * 1000 / len(queries)
+
+
+def main():
+    """Main function to benchmark coarse-to-fine retrieval."""
+    parser = argparse.ArgumentParser(description="Benchmark coarse-to-fine retrieval")
+    parser.add_argument(
+        "--sizes",
+        type=str,
+        default="10000,100000,500000",
+        help="Comma-separated corpus sizes, in chunks",
+    )
+    parser.add_argument(
+        "--chunks_per_doc",
+        type=str,
+        default="2,50",
+        help="Comma-separated chunks per document, e.g. short records and long files",
+    )
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument(
+        "--fan_outs",
+        type=str,
+        default="5,20,50",
+        help="Comma-separated fan-out widths to compare",
+    )
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=TOP_K_RETRIEVAL)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    fan_outs = [int(fan_out) for fan_out in args.fan_outs.split(",")]
+    chunks_per_docs = [int(count) for count in args.chunks_per_doc.split(",")]
+    rng = np.random.default_rng(args.seed)
+    rows = []
+
+    for chunks_per_doc in chunks_per_docs:
+        for size in sizes:
+            num_docs = max(1, size // chunks_per_doc)
+            vectors, sources = make_corpus(num_docs, chunks_per_doc, args.dim, rng)
+            print(
+                f"Building indexes for {len(vectors)} chunks "
+                f"in {num_docs} documents..."
+            )
+
+            index = faiss.IndexFlatL2(args.dim)
+            index.add(vectors)
+            document_index = DocumentIndex.build(index, sources)
+
+            # Queries are perturbed copies of random chunks
+            picks = rng.choice(len(vectors), size=args.queries, replace=False)
+            queries = vectors[picks] + 0.3 * rng.standard_normal(
+                (args.queries, args.dim)
+            ).astype(np.float32)
+
+            flat_results, flat_ms = time_queries(
+                lambda query: index.search(query, args.k)[1][0], queries
+            )
+            rows.append([
+                len(vectors), chunks_per_doc, "flat", f"{flat_ms:.2f}", "100.0%", "-"
+            ])
+
+            for fan_out in fan_outs:
+                results, ms = time_queries(
+                    lambda query: document_index.search(index, query, fan_out)[:args.k],
+                    queries,
+                )
+                hits = sum(
+                    len(set(flat) & set(found))
+                    for flat, found in zip(flat_results, results)
+                )
+                recall = hits / (args.queries * args.k)
+                rows.append([
+                    len(vectors),
+                    chunks_per_doc,
+                    f"fan-out {fan_out}",
+                    f"{ms:.2f}",
+                    f"{recall:.1%}",
+                    f"{flat_ms / ms:.1f}x",
+                ])
+
+    print()
+    print(tabulate(
+        rows,
+        headers=[
+            "Chunks", "Chunks/doc", "Search", "ms/query", f"Recall@{args.k}", "Speedup"
+        ],
+        tablefmt="grid",
+    ))
+
+
+if __name__ == "__main__":
+    main()
@@ -5,11 +5,23 @@ Script to process and index documents for the RAG pipeline.
 
 import os
 import argparse
+from itertools import chain
 from tqdm import tqdm
 
-from rag.document_loader import load_documents, split_documents
+from rag.document_loader import (
+    SUPPORTED_EXTENSIONS,
+    find_files,
+    lazy_load_documents,
+    iter_split_documents,
+)
 from rag.embeddings import create_vector_store
-from rag.config import VECTOR_STORE_PATH
+from rag.config import (
+    VECTOR_STORE_PATH,
+    RECORD_TEXT_FIELD,
+    RECORD_METADATA_FIELDS,
+    REDUCTION_METHOD,
+    REDUCTION_DIM,
+)
 
 
 def main():
@@ -27,6 +39,31 @@ def main():
         default=VECTOR_STORE_PATH,
         help="Path to save the vector store",
     )
+    parser.add_argument(
+        "--text_field",
+        type=str,
+        default=RECORD_TEXT_FIELD,
+        help="Field holding the text of JSONL and CSV records",
+    )
+    parser.add_argument(
+        "--metadata_fields",
+        type=str,
+        default=",".join(RECORD_METADATA_FIELDS),
+        help="Comma-separated JSONL/CSV fields to keep as metadata (default: all)",
+    )
+    parser.add_argument(
+        "--reduction_method",
+        type=str,
+        choices=["", "pca", "truncate"],
+        default=REDUCTION_METHOD,
+        help="Reduce embeddings with PCA or Matryoshka truncation",
+    )
+    parser.add_argument(
+        "--target_dim",
+        type=int,
+        default=REDUCTION_DIM,
+        help="Dimension to reduce embeddings to (0 keeps the full dimension)",
+    )
     args = parser.parse_args()
     
     print(f"Indexing documents from {args.data_dir}")
@@ -39,26 +76,32 @@ def main():
         return
     
     # Check if there are any documents in the data directory
-    if not any(f.endswith(('.pdf', '.txt')) for f in os.listdir(args.data_dir)):
-        print(f"No PDF or TXT documents found in {args.data_dir}")
+    if next(find_files(args.data_dir, SUPPORTED_EXTENSIONS), None) is None:
+        print(f"No supported documents found in {args.data_dir}")
+        print(f"Supported formats: {', '.join(SUPPORTED_EXTENSIONS)}")
         print(f"Please add documents to {args.data_dir} and run this script again.")
         return
     
-    # Load documents
-    print("Loading documents...")
-    documents = load_documents(args.data_dir)
+    metadata_fields = [
+        field.strip() for field in args.metadata_fields.split(",") if field.strip()
+    ]
     
-    if not documents:
+    # Documents are loaded, split and embedded as a stream
+    print("Loading, splitting and embedding documents...")
+    documents = lazy_load_documents(args.data_dir, args.text_field, metadata_fields)
+    chunks = iter_split_documents(documents)
+    
+    first_chunk = next(chunks, None)
+    if first_chunk is None:
         print("No documents were loaded. Please check your data directory.")
         return
     
-    # Split documents into chunks
-    print("Splitting documents into chunks...")
-    chunks = split_documents(documents)
-    
-    # Create vector store
-    print("Creating vector store...")
-    create_vector_store(chunks, args.vector_store)
+    create_vector_store(
+        chain([first_chunk], chunks),
+        args.vector_store,
+        reduction_method=args.reduction_method,
+        target_dim=args.target_dim,
+    )
     
     print(f"Indexing complete! Vector store saved to {args.vector_store}")
     print("You can now run query.py to ask questions about your documents.")
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Script to delete documents from, compact and roll back the RAG vector store.
+"""
+
+import os
+import argparse
+
+from rag.embeddings import load_vector_store
+from rag.snapshots import current_version, list_versions, rollback
+from rag.tombstones import (
+    delete_by_ids,
+    delete_by_source,
+    compact_vector_store,
+    index_stats,
+)
+from rag.config import VECTOR_STORE_PATH, COMPACTION_THRESHOLD
+
+
+def print_stats(stats):
+    """Print the live, dead and on-disk sizes of the vector store."""
+    print(f"Live entries: {stats['live']}")
+    print(f"Dead entries: {stats['dead']} ({stats['dead_ratio']:.1%})")
+    print(f"On-disk size: {stats['disk_bytes'] / (1024 * 1024):.2f} MB")
+
+
+def main():
+    """Main function to manage the vector store."""
+    parser = argparse.ArgumentParser(description="Manage the RAG vector store")
+    parser.add_argument(
+        "--vector_store",
+        type=str,
+        default=VECTOR_STORE_PATH,
+        help="Path to the vector store",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    delete_parser = subparsers.add_parser("delete", help="Mark documents as deleted")
+    delete_parser.add_argument(
+        "--source",
+        type=str,
+        action="append",
+        default=[],
+        help="Source file whose chunks should be deleted (repeatable)",
+    )
+    delete_parser.add_argument(
+        "--id",
+        type=str,
+        action="append",
+        default=[],
+        help="Docstore ID of a chunk to delete (repeatable)",
+    )
+
+    compact_parser = subparsers.add_parser(
+        "compact", help="Rewrite the index without deleted documents"
+    )
+    compact_parser.add_argument(
+        "--threshold",
+        type=float,
+        default=COMPACTION_THRESHOLD,
+        help="Dead-entry ratio at which compaction runs",
+    )
+    compact_parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Compact regardless of the threshold",
+    )
+
+    subparsers.add_parser("stats", help="Show live, dead and on-disk sizes")
+
+    subparsers.add_parser("versions", help="List the retained index versions")
+
+    rollback_parser = subparsers.add_parser(
+        "rollback", help="Make an earlier index version current"
+    )
+    rollback_parser.add_argument(
+        "--version",
+        type=str,
+        help="Version to roll back to (default: the one before current)",
+    )
+    args = parser.parse_args()
+
+    # Check if vector store exists
+    if not os.path.exists(args.vector_store):
+        print(f"Vector store not found at {args.vector_store}")
+        print("Please run index_documents.py first to create the vector store.")
+        return
+
+    if args.command == "versions":
+        current = current_version(args.vector_store)
+        for version in list_versions(args.vector_store):
+            marker = " (current)" if version == current else ""
+            print(f"{version}{marker}")
+        return
+
+    if args.command == "rollback":
+        try:
+            rollback(args.vector_store, args.version)
+        except (ValueError, FileNotFoundError) as e:
+            print(e)
+        return
+
+    vector_store = load_vector_store(args.vector_store)
+
+    if args.command == "delete":
+        if not args.source and not args.id:
+            print("Please provide at least one --source or --id to delete.")
+            return
+        for source in args.source:
+            delete_by_source(vector_store, source, args.vector_store)
+        if args.id:
+            delete_by_ids(vector_store, args.id, args.vector_store)
+
+    elif args.command == "compact":
+        compact_vector_store(
+            vector_store,
+            args.vector_store,
+            threshold=args.threshold,
+            force=args.force,
+        )
+
+    print_stats(index_stats(vector_store, args.vector_store))
+
+
+if __name__ == "__main__":
+    main()
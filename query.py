@@ -8,9 +8,10 @@ import argparse
 import time
 
 from rag.embeddings import load_vector_store
+from rag.reloader import HotReloadingVectorStore
 from rag.retriever import retrieve_documents, format_context
 from rag.generator import generate_answer
-from rag.config import VECTOR_STORE_PATH, OLLAMA_LLM_MODEL
+from rag.config import VECTOR_STORE_PATH, OLLAMA_LLM_MODEL, COARSE_FAN_OUT
 
 
 def main():
@@ -32,6 +33,12 @@ def main():
         type=str,
         help="Query to run (if not in interactive mode)",
     )
+    parser.add_argument(
+        "--fan_out",
+        type=int,
+        default=COARSE_FAN_OUT,
+        help="Number of source documents to search the chunks of (0 searches all chunks)",
+    )
     args = parser.parse_args()
     
     # Check if vector store exists
@@ -40,13 +47,14 @@ def main():
         print("Please run index_documents.py first to create the vector store.")
         return
     
-    # Load vector store
-    print(f"Loading vector store from {args.vector_store}...")
-    vector_store = load_vector_store(args.vector_store)
-    
     print(f"Using LLM model: {OLLAMA_LLM_MODEL}")
     
     if args.interactive:
+        # Pick up new index versions without restarting the session
+        print(f"Loading vector store from {args.vector_store}...")
+        reloader = HotReloadingVectorStore(args.vector_store)
+        reloader.start()
+        
         print("\n=== Interactive RAG Query Mode ===")
         print("Type 'exit' or 'quit' to end the session.")
         
@@ -55,6 +63,7 @@ def main():
             
             if query.lower() in ["exit", "quit"]:
                 print("Exiting...")
+                reloader.stop()
                 break
             
             if not query.strip():
@@ -63,7 +72,7 @@ def main():
             start_time = time.time()
             
             # Retrieve relevant documents
-            documents = retrieve_documents(vector_store, query)
+            documents = retrieve_documents(reloader.get(), query, args.fan_out)
             
             # Format context
             context = format_context(documents)
@@ -80,10 +89,14 @@ def main():
     elif args.query:
         query = args.query
         
+        # Load vector store
+        print(f"Loading vector store from {args.vector_store}...")
+        vector_store = load_vector_store(args.vector_store)
+        
         start_time = time.time()
         
         # Retrieve relevant documents
-        documents = retrieve_documents(vector_store, query)
+        documents = retrieve_documents(vector_store, query, args.fan_out)
         
         # Format context
         context = format_context(documents)
@@ -1,15 +1,37 @@
 """RAG pipeline package."""
 
-from rag.document_loader import load_documents, split_documents
+from rag.document_loader import (
+    load_documents,
+    lazy_load_documents,
+    split_documents,
+    iter_split_documents,
+)
 from rag.embeddings import create_vector_store, load_vector_store, get_embeddings
+from rag.cpu_embeddings import CPUEmbeddings
+from rag.hierarchy import DocumentIndex
+from rag.reduction import Projection, ProjectedEmbeddings
+from rag.reloader import HotReloadingVectorStore
+from rag.snapshots import list_versions, current_version, rollback
 from rag.retriever import retrieve_documents, format_context
+from rag.tombstones import (
+    delete_by_ids,
+    delete_by_source,
+    compact_vector_store,
+    index_stats,
+)
 from rag.generator import generate_answer, get_llm
 from rag.config import (
     OLLAMA_BASE_URL,
     OLLAMA_EMBED_MODEL,
     OLLAMA_LLM_MODEL,
     VECTOR_STORE_PATH,
+    COMPACTION_THRESHOLD,
+    SNAPSHOT_RETENTION,
+    SNAPSHOT_POLL_INTERVAL,
+    REDUCTION_METHOD,
+    REDUCTION_DIM,
     CHUNK_SIZE,
     CHUNK_OVERLAP,
     TOP_K_RETRIEVAL,
+    COARSE_FAN_OUT,
 ) 
\ No newline at end of file
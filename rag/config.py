@@ -11,12 +11,55 @@ OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
 OLLAMA_EMBED_MODEL = os.getenv("OLLAMA_EMBED_MODEL", "nomic-embed-text")
 OLLAMA_LLM_MODEL = os.getenv("OLLAMA_LLM_MODEL", "llama3")
 
+# HuggingFace CPU Fallback Configuration
+HF_EMBED_MODEL = os.getenv("HF_EMBED_MODEL", "all-MiniLM-L6-v2")
+HF_BATCH_SIZE = int(os.getenv("HF_BATCH_SIZE", 64))
+HF_NUM_WORKERS = int(os.getenv("HF_NUM_WORKERS", 1))
+# Threads per worker process; 0 splits the CPUs evenly between workers
+HF_THREADS_PER_WORKER = int(os.getenv("HF_THREADS_PER_WORKER", 0))
+# Backend is "torch", "onnx" or "onnx-quantized"
+HF_BACKEND = os.getenv("HF_BACKEND", "torch")
+HF_ONNX_QUANTIZED_FILE = os.getenv("HF_ONNX_QUANTIZED_FILE", "onnx/model_quint8_avx2.onnx")
+
 # Vector Store Configuration
 VECTOR_STORE_PATH = os.getenv("VECTOR_STORE_PATH", "./vector_store")
 
+# Number of index versions kept for rollback
+SNAPSHOT_RETENTION = int(os.getenv("SNAPSHOT_RETENTION", 3))
+# Seconds between checks for a new index version in long-running processes
+SNAPSHOT_POLL_INTERVAL = float(os.getenv("SNAPSHOT_POLL_INTERVAL", 5))
+
+# Embedding Reduction Settings
+# Method is "pca" or "truncate" (Matryoshka models); leave empty to store full vectors
+REDUCTION_METHOD = os.getenv("REDUCTION_METHOD", "")
+REDUCTION_DIM = int(os.getenv("REDUCTION_DIM", 0))
+# Number of vectors, sampled across the whole index, used to fit the projection
+REDUCTION_SAMPLE_SIZE = int(os.getenv("REDUCTION_SAMPLE_SIZE", 10000))
+
+# Fraction of deleted entries at which the vector store is compacted
+COMPACTION_THRESHOLD = float(os.getenv("COMPACTION_THRESHOLD", 0.2))
+
 # Document Settings
 CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", 1000))
 CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", 200))
 
+# Structured Record Settings (JSONL / CSV)
+RECORD_TEXT_FIELD = os.getenv("RECORD_TEXT_FIELD", "text")
+# Comma-separated list of fields to copy into metadata; empty keeps all other fields
+RECORD_METADATA_FIELDS = [
+    field.strip()
+    for field in os.getenv("RECORD_METADATA_FIELDS", "").split(",")
+    if field.strip()
+]
+
+# Indexing Settings
+INDEX_BATCH_SIZE = int(os.getenv("INDEX_BATCH_SIZE", 1000))
+# Approximate characters per document when streaming large HTML and Markdown files
+STREAM_SECTION_SIZE = int(os.getenv("STREAM_SECTION_SIZE", 1000000))
+
 # Retrieval Settings
-TOP_K_RETRIEVAL = int(os.getenv("TOP_K_RETRIEVAL", 4)) 
\ No newline at end of file
+TOP_K_RETRIEVAL = int(os.getenv("TOP_K_RETRIEVAL", 4))
+# Number of source documents searched chunk by chunk; 0 searches all chunks
+COARSE_FAN_OUT = int(os.getenv("COARSE_FAN_OUT", 0))
+# Maximum number of chunks per document vector; larger documents are split
+HIERARCHY_MAX_GROUP_SIZE = int(os.getenv("HIERARCHY_MAX_GROUP_SIZE", 1000)) 
\ No newline at end of file
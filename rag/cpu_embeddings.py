@@ -0,0 +1,278 @@
+"""High-throughput CPU embeddings for the HuggingFace fallback."""
+
+import atexit
+import multiprocessing
+import os
+import time
+from typing import Dict, List, Optional
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from rag.config import (
+    HF_EMBED_MODEL,
+    HF_BATCH_SIZE,
+    HF_NUM_WORKERS,
+    HF_THREADS_PER_WORKER,
+    HF_BACKEND,
+    HF_ONNX_QUANTIZED_FILE,
+)
+
+CPU_BACKENDS = ("torch", "onnx", "onnx-quantized")
+
+# Minimum cosine similarity to the default fallback's vectors for each backend
+EXPECTED_MIN_COSINE = {
+    "torch": 0.9999,
+    "onnx": 0.999,
+    "onnx-quantized": 0.98,
+}
+
+# Model loaded once per pool worker
+_worker_model = None
+
+
+def _load_model(model_name: str, backend: str, num_threads: int = 0):
+    """
+    Load a SentenceTransformer model on the CPU with the given backend.
+
+    For the ONNX backends, the thread count is passed to the ONNX Runtime
+    session, since torch.set_num_threads does not affect it.
+    """
+    from sentence_transformers import SentenceTransformer
+
+    if backend == "torch":
+        return SentenceTransformer(model_name, device="cpu")
+
+    import onnxruntime
+
+    session_options = onnxruntime.SessionOptions()
+    if num_threads:
+        session_options.intra_op_num_threads = num_threads
+        session_options.inter_op_num_threads = 1
+    model_kwargs = {
+        "provider": "CPUExecutionProvider",
+        "session_options": session_options,
+    }
+    if backend == "onnx-quantized":
+        model_kwargs["file_name"] = HF_ONNX_QUANTIZED_FILE
+    return SentenceTransformer(
+        model_name,
+        device="cpu",
+        backend="onnx",
+        model_kwargs=model_kwargs,
+    )
+
+
+def _pin_threads(num_threads: int, cpus: Optional[List[int]] = None):
+    """
+    Limit PyTorch to a number of threads and, if given, pin the process to CPUs.
+
+    ONNX Runtime threads are set separately, when the model is loaded.
+    """
+    import torch
+
+    os.environ["OMP_NUM_THREADS"] = str(num_threads)
+    torch.set_num_threads(num_threads)
+    if cpus and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpus)
+
+
+def _init_worker(
+    model_name: str,
+    backend: str,
+    num_threads: int,
+    cpu_slots: List[List[int]],
+):
+    """Pool initializer: pin the worker to its own CPUs and load the model."""
+    global _worker_model
+
+    # Worker identities are 1-based and unique within the pool
+    identity = multiprocessing.current_process()._identity
+    slot = (identity[0] - 1) % len(cpu_slots) if identity and cpu_slots else None
+    _pin_threads(num_threads, cpu_slots[slot] if slot is not None else None)
+    _worker_model = _load_model(model_name, backend, num_threads)
+
+
+def _encode_in_worker(args) -> np.ndarray:
+    """Encode one batch of texts in a pool worker."""
+    texts, batch_size = args
+    return _worker_model.encode(
+        texts,
+        batch_size=batch_size,
+        convert_to_numpy=True,
+        show_progress_bar=False,
+    )
+
+
+class CPUEmbeddings(Embeddings):
+    """
+    SentenceTransformer embeddings tuned for CPU-only indexing.
+
+    Inputs are sorted by length so that batches need little padding, and
+    large inputs are spread over a pool of worker processes, each pinned
+    to its own CPUs and thread count. The thread settings of the calling
+    process are left alone unless threads_per_worker is given. The "onnx"
+    and "onnx-quantized" backends run the model with ONNX Runtime instead
+    of PyTorch.
+    """
+
+    def __init__(
+        self,
+        model_name: str = HF_EMBED_MODEL,
+        batch_size: int = HF_BATCH_SIZE,
+        num_workers: int = HF_NUM_WORKERS,
+        threads_per_worker: int = HF_THREADS_PER_WORKER,
+        backend: str = HF_BACKEND,
+    ):
+        if backend not in CPU_BACKENDS:
+            raise ValueError(
+                f"Unknown CPU backend '{backend}', "
+                f"expected one of: {', '.join(CPU_BACKENDS)}"
+            )
+        cpu_count = os.cpu_count() or 1
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.num_workers = max(1, num_workers)
+        self.threads_per_worker = (
+            threads_per_worker or max(1, cpu_count // self.num_workers)
+        )
+        self.backend = backend
+        self._pool = None
+        # Totals over every embed_documents call, for throughput reports
+        self.embedded_count = 0
+        self.embed_seconds = 0.0
+
+        # The calling process's thread settings are only changed on request
+        if threads_per_worker and self.num_workers == 1:
+            _pin_threads(threads_per_worker)
+        self.model = _load_model(model_name, backend, threads_per_worker)
+
+    def _cpu_slots(self) -> List[List[int]]:
+        """Split the available CPUs into one slice per worker."""
+        if hasattr(os, "sched_getaffinity"):
+            cpus = sorted(os.sched_getaffinity(0))
+        else:
+            cpus = list(range(os.cpu_count() or 1))
+        if len(cpus) < self.num_workers * self.threads_per_worker:
+            return []
+        return [
+            cpus[i * self.threads_per_worker:(i + 1) * self.threads_per_worker]
+            for i in range(self.num_workers)
+        ]
+
+    def _get_pool(self):
+        """Start the worker pool on first use."""
+        if self._pool is None:
+            context = multiprocessing.get_context("spawn")
+            self._pool = context.Pool(
+                processes=self.num_workers,
+                initializer=_init_worker,
+                initargs=(
+                    self.model_name,
+                    self.backend,
+                    self.threads_per_worker,
+                    self._cpu_slots(),
+                ),
+            )
+            atexit.register(self.close)
+        return self._pool
+
+    def close(self):
+        """Shut down the worker pool, if one was started."""
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """
+        Encode texts into embeddings.
+
+        Args:
+            texts: Texts to encode.
+
+        Returns:
+            Array of embeddings, one row per text, in input order.
+        """
+        if not texts:
+            dim = self.model.get_sentence_embedding_dimension()
+            return np.zeros((0, dim), dtype=np.float32)
+
+        # Same normalisation as HuggingFaceEmbeddings, so vectors stay compatible
+        texts = [text.replace("\n", " ") for text in texts]
+
+        # Longest first, so each batch holds texts of similar length
+        order = np.argsort([-len(text) for text in texts], kind="stable")
+        sorted_texts = [texts[i] for i in order]
+
+        if self.num_workers > 1 and len(texts) > self.batch_size:
+            batches = [
+                (sorted_texts[i:i + self.batch_size], self.batch_size)
+                for i in range(0, len(sorted_texts), self.batch_size)
+            ]
+            results = self._get_pool().map(_encode_in_worker, batches)
+            sorted_vectors = np.vstack(results)
+        else:
+            sorted_vectors = self.model.encode(
+                sorted_texts,
+                batch_size=self.batch_size,
+                convert_to_numpy=True,
+                show_progress_bar=False,
+            )
+
+        vectors = np.empty_like(sorted_vectors)
+        vectors[order] = sorted_vectors
+        return vectors
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        start_time = time.time()
+        vectors = self.encode(texts)
+        self.embed_seconds += time.time() - start_time
+        self.embedded_count += len(texts)
+        return vectors.tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.encode([text])[0].tolist()
+
+
+def compare_with_reference(
+    embeddings: CPUEmbeddings,
+    texts: List[str],
+    reference: Optional[List[List[float]]] = None,
+) -> Dict:
+    """
+    Compare embeddings with the default HuggingFace fallback.
+
+    The reference is the output of HuggingFaceEmbeddings with the settings
+    the fallback used before, including its text preprocessing.
+
+    Args:
+        embeddings: CPUEmbeddings instance to check.
+        texts: Texts to encode with both.
+        reference: Vectors HuggingFaceEmbeddings returned for the texts;
+            computed here if not given.
+
+    Returns:
+        Dictionary with min_cosine, max_abs_diff, expected_min_cosine and
+        within_tolerance entries.
+    """
+    if reference is None:
+        from langchain_community.embeddings import HuggingFaceEmbeddings
+
+        reference = HuggingFaceEmbeddings(
+            model_name=embeddings.model_name,
+            model_kwargs={"device": "cpu"},
+        ).embed_documents(texts)
+    reference = np.asarray(reference, dtype=np.float32)
+    vectors = embeddings.encode(texts)
+
+    cosine = np.sum(reference * vectors, axis=1) / (
+        np.linalg.norm(reference, axis=1) * np.linalg.norm(vectors, axis=1)
+    )
+    min_cosine = float(cosine.min())
+    expected = EXPECTED_MIN_COSINE[embeddings.backend]
+    return {
+        "min_cosine": min_cosine,
+        "max_abs_diff": float(np.abs(reference - vectors).max()),
+        "expected_min_cosine": expected,
+        "within_tolerance": min_cosine >= expected,
+    }
@@ -1,72 +1,473 @@
 """Document loading and parsing utilities."""
 
+import csv
+import json
 import os
-from typing import List, Optional
-from langchain_community.document_loaders import (
-    PyPDFLoader,
-    TextLoader,
-    DirectoryLoader,
-)
+import sys
+import time
+from html.parser import HTMLParser
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional
+from langchain_community.document_loaders import PyPDFLoader, TextLoader
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.schema import Document
 
-from rag.config import CHUNK_SIZE, CHUNK_OVERLAP
+from rag.config import (
+    CHUNK_SIZE,
+    CHUNK_OVERLAP,
+    RECORD_TEXT_FIELD,
+    RECORD_METADATA_FIELDS,
+    INDEX_BATCH_SIZE,
+    STREAM_SECTION_SIZE,
+)
 
+# File extensions handled by each loader
+PDF_EXTENSIONS = (".pdf",)
+TEXT_EXTENSIONS = (".txt",)
+JSONL_EXTENSIONS = (".jsonl", ".ndjson")
+CSV_EXTENSIONS = (".csv",)
+MARKDOWN_EXTENSIONS = (".md", ".markdown")
+HTML_EXTENSIONS = (".html", ".htm")
+SUPPORTED_EXTENSIONS = (
+    PDF_EXTENSIONS
+    + TEXT_EXTENSIONS
+    + JSONL_EXTENSIONS
+    + CSV_EXTENSIONS
+    + MARKDOWN_EXTENSIONS
+    + HTML_EXTENSIONS
+)
 
-def load_documents(directory_path: str) -> List[Document]:
+# Size of the blocks fed to the HTML parser
+_HTML_READ_SIZE = 64 * 1024
+
+
+def find_files(directory_path: str, extensions: tuple) -> Iterator[str]:
     """
-    Load documents from a directory.
-    
+    Recursively find files with the given extensions.
+
+    Args:
+        directory_path: Path to the directory to search.
+        extensions: Lower-case file extensions to match.
+
+    Returns:
+        Iterator over matching file paths, in sorted order.
+    """
+    for root, dirs, files in os.walk(directory_path):
+        dirs.sort()
+        for name in sorted(files):
+            if name.lower().endswith(extensions):
+                yield os.path.join(root, name)
+
+
+def _record_metadata(
+    record: Dict,
+    text_field: str,
+    metadata_fields: Optional[List[str]],
+) -> Dict:
+    """
+    Build the metadata for a structured record.
+
+    Only scalar values are kept. When no metadata fields are given, every
+    field other than the text field is copied.
+    """
+    if metadata_fields:
+        items = ((field, record.get(field)) for field in metadata_fields)
+    else:
+        items = ((k, v) for k, v in record.items() if k != text_field)
+    return {
+        k: v for k, v in items
+        if isinstance(v, (str, int, float, bool))
+    }
+
+
+def iter_jsonl_documents(
+    file_path: str,
+    text_field: str = RECORD_TEXT_FIELD,
+    metadata_fields: Optional[List[str]] = RECORD_METADATA_FIELDS,
+) -> Iterator[Document]:
+    """
+    Lazily load one document per line of a JSONL file.
+
+    Args:
+        file_path: Path to the JSONL file.
+        text_field: Record field holding the document text.
+        metadata_fields: Record fields to copy into metadata.
+
+    Returns:
+        Iterator over documents.
+    """
+    skipped = 0
+    with open(file_path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                skipped += 1
+                continue
+            if not isinstance(record, dict):
+                skipped += 1
+                continue
+            text = record.get(text_field)
+            if not isinstance(text, str) or not text.strip():
+                skipped += 1
+                continue
+            metadata = _record_metadata(record, text_field, metadata_fields)
+            metadata.update({"source": file_path, "line": line_number})
+            yield Document(page_content=text, metadata=metadata)
+
+    if skipped:
+        print(f"Skipped {skipped} malformed or empty records in {file_path}")
+
+
+def iter_csv_documents(
+    file_path: str,
+    text_field: str = RECORD_TEXT_FIELD,
+    metadata_fields: Optional[List[str]] = RECORD_METADATA_FIELDS,
+) -> Iterator[Document]:
+    """
+    Lazily load one document per row of a CSV file with a header row.
+
+    Args:
+        file_path: Path to the CSV file.
+        text_field: Column holding the document text.
+        metadata_fields: Columns to copy into metadata.
+
+    Returns:
+        Iterator over documents.
+    """
+    # Exported corpora often have very long text cells
+    csv.field_size_limit(min(sys.maxsize, 2**31 - 1))
+
+    skipped = 0
+    with open(file_path, "r", encoding="utf-8", newline="") as f:
+        reader = csv.DictReader(f)
+        if reader.fieldnames is None or text_field not in reader.fieldnames:
+            print(f"Column '{text_field}' not found in {file_path}, skipping file")
+            return
+        for row_number, row in enumerate(reader):
+            text = row.get(text_field)
+            if not text or not text.strip():
+                skipped += 1
+                continue
+            metadata = _record_metadata(row, text_field, metadata_fields)
+            metadata.update({"source": file_path, "row": row_number})
+            yield Document(page_content=text, metadata=metadata)
+
+    if skipped:
+        print(f"Skipped {skipped} empty rows in {file_path}")
+
+
+def iter_markdown_documents(
+    file_path: str,
+    section_size: int = STREAM_SECTION_SIZE,
+) -> Iterator[Document]:
+    """
+    Lazily load a Markdown file, one document per section.
+
+    The file is read line by line. Once the current section holds
+    section_size characters, a new one starts at the next heading, or at
+    the next line if twice that size passes without a heading. Files
+    smaller than section_size become a single document.
+
+    Args:
+        file_path: Path to the Markdown file.
+        section_size: Approximate maximum number of characters per document.
+
+    Returns:
+        Iterator over documents.
+    """
+    lines: List[str] = []
+    size = 0
+    section = 0
+
+    def flush():
+        text = "".join(lines)
+        if text.strip():
+            yield Document(
+                page_content=text,
+                metadata={"source": file_path, "section": section},
+            )
+
+    with open(file_path, "r", encoding="utf-8") as f:
+        for line in f:
+            at_heading = line.startswith("#")
+            if size >= 2 * section_size or (size >= section_size and at_heading):
+                yield from flush()
+                section += 1
+                lines, size = [], 0
+            lines.append(line)
+            size += len(line)
+    yield from flush()
+
+
+class _HTMLTextExtractor(HTMLParser):
+    """
+    HTML parser that collects visible text and the page title.
+
+    Text is cut into sections of roughly section_size characters at block
+    boundaries, and finished sections are queued in `sections` so they can
+    be taken out while the rest of the file is still being parsed.
+    """
+
+    _SKIPPED_TAGS = {"script", "style", "noscript", "template"}
+    _BLOCK_TAGS = {
+        "p", "div", "br", "li", "tr", "section", "article",
+        "h1", "h2", "h3", "h4", "h5", "h6", "pre", "blockquote",
+    }
+
+    def __init__(self, section_size: int = STREAM_SECTION_SIZE):
+        super().__init__(convert_charrefs=True)
+        self.section_size = section_size
+        self.parts: List[str] = []
+        self.sections: List[str] = []
+        self.title_parts: List[str] = []
+        self._size = 0
+        self._skip_depth = 0
+        self._in_title = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self._SKIPPED_TAGS:
+            self._skip_depth += 1
+        elif tag == "title":
+            self._in_title = True
+        elif tag in self._BLOCK_TAGS:
+            self._block_boundary()
+
+    def handle_endtag(self, tag):
+        if tag in self._SKIPPED_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+        elif tag == "title":
+            self._in_title = False
+        elif tag in self._BLOCK_TAGS:
+            self._block_boundary()
+
+    def handle_data(self, data):
+        if self._skip_depth:
+            return
+        if self._in_title:
+            self.title_parts.append(data)
+            return
+        self.parts.append(data)
+        self._size += len(data)
+        # Bound memory even when no block boundary ever comes
+        if self._size >= 2 * self.section_size:
+            self.flush()
+
+    def _block_boundary(self):
+        self.parts.append("\n")
+        if self._size >= self.section_size:
+            self.flush()
+
+    def flush(self):
+        """Queue the collected text as a finished section."""
+        lines = (" ".join(line.split()) for line in "".join(self.parts).splitlines())
+        text = "\n".join(line for line in lines if line)
+        if text:
+            self.sections.append(text)
+        self.parts = []
+        self._size = 0
+
+    def title(self) -> str:
+        return " ".join("".join(self.title_parts).split())
+
+
+def iter_html_documents(
+    file_path: str,
+    section_size: int = STREAM_SECTION_SIZE,
+) -> Iterator[Document]:
+    """
+    Lazily load an HTML file as plain-text documents, one per section.
+
+    The file is fed to the parser in blocks, and sections of roughly
+    section_size characters are yielded as soon as they are complete, so
+    neither the markup nor the text is held in memory as a whole. Files
+    with less text than section_size become a single document.
+
+    Args:
+        file_path: Path to the HTML file.
+        section_size: Approximate maximum number of characters per document.
+
+    Returns:
+        Iterator over documents with visible text.
+    """
+    parser = _HTMLTextExtractor(section_size)
+    section = 0
+
+    def drain():
+        nonlocal section
+        for text in parser.sections:
+            metadata = {"source": file_path, "section": section}
+            title = parser.title()
+            if title:
+                metadata["title"] = title
+            yield Document(page_content=text, metadata=metadata)
+            section += 1
+        parser.sections = []
+
+    with open(file_path, "r", encoding="utf-8", errors="replace") as f:
+        while True:
+            block = f.read(_HTML_READ_SIZE)
+            if not block:
+                break
+            parser.feed(block)
+            yield from drain()
+    parser.close()
+    parser.flush()
+    yield from drain()
+
+
+def _report_rate(documents: Iterable[Document], label: str) -> Iterator[Document]:
+    """
+    Pass documents through, printing the record count and rate once exhausted.
+
+    Only time spent inside the loader is counted, not time the consumer
+    spends splitting and embedding while this generator is paused.
+    """
+    documents = iter(documents)
+    count = 0
+    elapsed = 0.0
+    while True:
+        start_time = time.perf_counter()
+        doc = next(documents, None)
+        elapsed += time.perf_counter() - start_time
+        if doc is None:
+            break
+        count += 1
+        yield doc
+    if count:
+        elapsed = max(elapsed, 1e-9)
+        print(
+            f"Loaded {count} {label} records in {elapsed:.2f} seconds "
+            f"({count / elapsed:.1f} records/sec)"
+        )
+
+
+def lazy_load_documents(
+    directory_path: str,
+    text_field: str = RECORD_TEXT_FIELD,
+    metadata_fields: Optional[List[str]] = RECORD_METADATA_FIELDS,
+) -> Iterator[Document]:
+    """
+    Lazily load documents of every supported format from a directory.
+
     Args:
         directory_path: Path to the directory containing documents.
-        
+        text_field: Field holding the text of JSONL and CSV records.
+        metadata_fields: JSONL and CSV fields to copy into metadata.
+
     Returns:
-        List of loaded documents.
+        Iterator over loaded documents.
     """
     # Check if directory exists
     if not os.path.exists(directory_path):
         raise FileNotFoundError(f"Directory not found: {directory_path}")
-    
-    # Create loaders for different file types
-    pdf_loader = DirectoryLoader(
-        directory_path,
-        glob="**/*.pdf",
-        loader_cls=PyPDFLoader,
-    )
-    
-    text_loader = DirectoryLoader(
-        directory_path,
-        glob="**/*.txt",
-        loader_cls=TextLoader,
-    )
-    
-    # Load documents
-    pdf_docs = pdf_loader.load() if os.path.exists(directory_path) else []
-    text_docs = text_loader.load() if os.path.exists(directory_path) else []
-    
-    # Combine all documents
-    all_docs = pdf_docs + text_docs
-    
+
+    # Files are matched by find_files so extensions are case-insensitive
+    def _pdf():
+        for path in find_files(directory_path, PDF_EXTENSIONS):
+            yield from PyPDFLoader(path).lazy_load()
+
+    def _text():
+        for path in find_files(directory_path, TEXT_EXTENSIONS):
+            yield from TextLoader(path).lazy_load()
+
+    def _jsonl():
+        for path in find_files(directory_path, JSONL_EXTENSIONS):
+            yield from iter_jsonl_documents(path, text_field, metadata_fields)
+
+    def _csv():
+        for path in find_files(directory_path, CSV_EXTENSIONS):
+            yield from iter_csv_documents(path, text_field, metadata_fields)
+
+    def _markdown():
+        for path in find_files(directory_path, MARKDOWN_EXTENSIONS):
+            yield from iter_markdown_documents(path)
+
+    def _html():
+        for path in find_files(directory_path, HTML_EXTENSIONS):
+            yield from iter_html_documents(path)
+
+    yield from _report_rate(_pdf(), "PDF")
+    yield from _report_rate(_text(), "TXT")
+    yield from _report_rate(_jsonl(), "JSONL")
+    yield from _report_rate(_csv(), "CSV")
+    yield from _report_rate(_markdown(), "Markdown")
+    yield from _report_rate(_html(), "HTML")
+
+
+def load_documents(directory_path: str) -> List[Document]:
+    """
+    Load documents from a directory.
+
+    Args:
+        directory_path: Path to the directory containing documents.
+
+    Returns:
+        List of loaded documents.
+    """
+    all_docs = list(lazy_load_documents(directory_path))
+
     print(f"Loaded {len(all_docs)} documents")
     return all_docs
 
 
+def _get_text_splitter() -> RecursiveCharacterTextSplitter:
+    """Create the text splitter used for chunking."""
+    return RecursiveCharacterTextSplitter(
+        chunk_size=CHUNK_SIZE,
+        chunk_overlap=CHUNK_OVERLAP,
+        length_function=len,
+    )
+
+
 def split_documents(documents: List[Document]) -> List[Document]:
     """
     Split documents into chunks.
-    
+
     Args:
         documents: List of documents to split.
-        
+
     Returns:
         List of document chunks.
     """
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=CHUNK_SIZE,
-        chunk_overlap=CHUNK_OVERLAP,
-        length_function=len,
-    )
-    
+    text_splitter = _get_text_splitter()
+
     chunks = text_splitter.split_documents(documents)
     print(f"Split {len(documents)} documents into {len(chunks)} chunks")
-    return chunks 
\ No newline at end of file
+    return chunks
+
+
+def iter_split_documents(
+    documents: Iterable[Document],
+    batch_size: int = INDEX_BATCH_SIZE,
+) -> Iterator[Document]:
+    """
+    Lazily split a stream of documents into chunks.
+
+    Documents are split in batches so only one batch is held in memory.
+
+    Args:
+        documents: Iterable of documents to split.
+        batch_size: Number of documents split at a time.
+
+    Returns:
+        Iterator over document chunks.
+    """
+    text_splitter = _get_text_splitter()
+    documents = iter(documents)
+    doc_count = 0
+    chunk_count = 0
+
+    while True:
+        batch = list(islice(documents, batch_size))
+        if not batch:
+            break
+        chunks = text_splitter.split_documents(batch)
+        doc_count += len(batch)
+        chunk_count += len(chunks)
+        yield from chunks
+
+    print(f"Split {doc_count} documents into {chunk_count} chunks")
@@ -1,13 +1,31 @@
 """Vector embedding utilities."""
 
 import os
-from typing import List
+from itertools import islice
+from typing import Iterable
 from langchain_community.vectorstores import FAISS
-from langchain_community.embeddings import HuggingFaceEmbeddings
 from langchain_ollama import OllamaEmbeddings
 from langchain.schema import Document
 
-from rag.config import OLLAMA_BASE_URL, OLLAMA_EMBED_MODEL, VECTOR_STORE_PATH
+from rag.config import (
+    OLLAMA_BASE_URL,
+    OLLAMA_EMBED_MODEL,
+    VECTOR_STORE_PATH,
+    INDEX_BATCH_SIZE,
+    REDUCTION_METHOD,
+    REDUCTION_DIM,
+    TOP_K_RETRIEVAL,
+)
+from rag.cpu_embeddings import CPUEmbeddings
+from rag.hierarchy import DocumentIndex
+from rag.reduction import (
+    Projection,
+    ProjectedEmbeddings,
+    reduce_vector_store,
+    print_reduction_report,
+)
+from rag.snapshots import resolve_store_path, save_version
+from rag.tombstones import load_tombstones
 
 
 def get_embeddings():
@@ -31,43 +49,114 @@ def get_embeddings():
         print(f"Failed to use Ollama embeddings: {e}")
         print("Falling back to local HuggingFace embeddings")
         
-        # Fall back to HuggingFace embeddings
-        return HuggingFaceEmbeddings(
-            model_name="all-MiniLM-L6-v2",
-            model_kwargs={"device": "cpu"},
-        )
+        # Fall back to HuggingFace embeddings on the CPU
+        return CPUEmbeddings()
 
 
-def create_vector_store(documents: List[Document], store_path: str = VECTOR_STORE_PATH):
+def create_vector_store(
+    documents: Iterable[Document],
+    store_path: str = VECTOR_STORE_PATH,
+    batch_size: int = INDEX_BATCH_SIZE,
+    reduction_method: str = REDUCTION_METHOD,
+    target_dim: int = REDUCTION_DIM,
+):
     """
     Create a vector store from documents.
     
+    Documents may be a list or a lazy iterator; they are embedded and added
+    to the index in batches so the full corpus is never held in memory.
+    
+    When a reduction method and target dimension are given, the full index
+    is built first, then projected with a projection fitted on a sample
+    spread across it; the projection is saved with the index.
+    
+    The index is written to a new version directory, which only becomes
+    current once it is complete.
+    
     Args:
-        documents: List of documents to embed.
+        documents: Iterable of documents to embed.
         store_path: Path to save the vector store.
+        batch_size: Number of documents embedded at a time.
+        reduction_method: "pca", "truncate", or empty for full vectors.
+        target_dim: Dimension to reduce embeddings to.
         
     Returns:
         FAISS vector store instance.
     """
     embeddings = get_embeddings()
+    if (
+        reduction_method == "truncate"
+        and target_dim
+        and isinstance(embeddings, CPUEmbeddings)
+    ):
+        print(
+            f"Warning: truncation assumes a Matryoshka-trained model, but the "
+            f"fallback model {embeddings.model_name} is not; use pca instead"
+        )
+    documents = iter(documents)
+    vector_store = None
+    projection = None
+    count = 0
+    
+    # Create vector store batch by batch
+    while True:
+        batch = list(islice(documents, batch_size))
+        if not batch:
+            break
+        if vector_store is None:
+            vector_store = FAISS.from_documents(batch, embeddings)
+        else:
+            vector_store.add_documents(batch)
+        count += len(batch)
+    
+    if vector_store is None:
+        raise ValueError("No documents to index")
+    
+    # Embedding throughput over the whole run, for engines that track it
+    embed_seconds = getattr(embeddings, "embed_seconds", 0)
+    if embed_seconds:
+        embedded_count = embeddings.embedded_count
+        print(
+            f"Embedded {embedded_count} texts in {embed_seconds:.2f} seconds "
+            f"({embedded_count / embed_seconds:.1f} sentences/sec)"
+        )
+    
+    if reduction_method and target_dim:
+        reduced = reduce_vector_store(
+            vector_store, reduction_method, target_dim, TOP_K_RETRIEVAL
+        )
+        if reduced is not None:
+            projection, evaluation = reduced
+    
+    # Document-level vectors for coarse-to-fine retrieval
+    vector_store.document_index = DocumentIndex.from_vector_store(vector_store)
     
-    # Create vector store
-    vector_store = FAISS.from_documents(documents, embeddings)
+    def write_extra(path: str):
+        vector_store.document_index.save(path)
+        if projection is not None:
+            projection.save(path)
     
-    # Save vector store
-    os.makedirs(os.path.dirname(store_path), exist_ok=True)
-    vector_store.save_local(store_path)
+    # Save vector store as a new version
+    os.makedirs(store_path, exist_ok=True)
+    path = save_version(vector_store, store_path, write_extra=write_extra)
+    vector_store.store_dir = path
+    if projection is not None:
+        print_reduction_report(projection, count, evaluation)
     
-    print(f"Created vector store with {len(documents)} documents at {store_path}")
+    # A rebuilt store starts with no deleted entries
+    vector_store.tombstones = set()
+    
+    print(f"Created vector store with {count} documents at {path}")
     return vector_store
 
 
-def load_vector_store(store_path: str = VECTOR_STORE_PATH):
+def load_vector_store(store_path: str = VECTOR_STORE_PATH, embeddings=None):
     """
     Load a vector store from disk.
     
     Args:
-        store_path: Path to the vector store.
+        store_path: Path to the vector store, or to one of its versions.
+        embeddings: Embedding model to reuse instead of creating a new one.
         
     Returns:
         FAISS vector store instance.
@@ -75,13 +164,25 @@ def load_vector_store(store_path: str = VECTOR_STORE_PATH):
     if not os.path.exists(store_path):
         raise FileNotFoundError(f"Vector store not found at {store_path}")
     
-    embeddings = get_embeddings()
+    store_path = resolve_store_path(store_path)
+    if embeddings is None:
+        embeddings = get_embeddings()
+    
+    # Query vectors must be projected the same way as the indexed ones
+    projection = Projection.load(store_path)
+    if projection is not None:
+        embeddings = ProjectedEmbeddings(embeddings, projection)
+    
     # Add allow_dangerous_deserialization=True to handle the pickle security warning
     vector_store = FAISS.load_local(
         store_path, 
         embeddings, 
         allow_dangerous_deserialization=True
     )
+    # Deletes are recorded against the version that was actually loaded
+    vector_store.store_dir = store_path
+    vector_store.tombstones = load_tombstones(store_path)
+    vector_store.document_index = DocumentIndex.load(store_path)
     
     print(f"Loaded vector store from {store_path}")
     return vector_store 
\ No newline at end of file
@@ -0,0 +1,207 @@
+"""Document-level index for coarse-to-fine retrieval."""
+
+import os
+from typing import List
+import faiss
+import numpy as np
+from langchain_community.vectorstores import FAISS
+from langchain_community.vectorstores.utils import DistanceStrategy
+
+from rag.config import HIERARCHY_MAX_GROUP_SIZE
+
+HIERARCHY_FILE = "hierarchy.npz"
+
+# Number of chunk vectors reconstructed from the index at a time
+_BUILD_BLOCK_SIZE = 65536
+
+
+class DocumentIndex:
+    """
+    One vector per document, searched before the chunk index.
+
+    A document is a source file. Documents with more chunks than the
+    maximum group size are split into sections of consecutive chunks, so a
+    large export gets several bounded vectors instead of one. Each document vector is the mean of its chunk
+    embeddings. A query first picks the closest documents here, and only
+    their chunks are then scored. Chunks are referred to by their position
+    in the chunk-level FAISS index.
+    """
+
+    def __init__(
+        self,
+        sources: List[str],
+        centroids: np.ndarray,
+        offsets: np.ndarray,
+        positions: np.ndarray,
+        inner_product: bool = False,
+    ):
+        self.sources = sources
+        self.centroids = np.ascontiguousarray(centroids, dtype=np.float32)
+        # Chunks of document i are positions[offsets[i]:offsets[i + 1]]
+        self.offsets = offsets
+        self.positions = positions
+        self.inner_product = inner_product
+
+        dim = self.centroids.shape[1]
+        if inner_product:
+            self._index = faiss.IndexFlatIP(dim)
+        else:
+            self._index = faiss.IndexFlatL2(dim)
+        self._index.add(self.centroids)
+
+    @classmethod
+    def build(
+        cls,
+        index: faiss.Index,
+        sources: List[str],
+        inner_product: bool = False,
+        max_group_size: int = HIERARCHY_MAX_GROUP_SIZE,
+    ) -> "DocumentIndex":
+        """
+        Build the document index from a chunk index.
+
+        Args:
+            index: Chunk-level FAISS index.
+            sources: Document of each chunk, by index position.
+            inner_product: Whether the chunk index scores by inner product.
+            max_group_size: Maximum number of chunks per document vector.
+
+        Returns:
+            Document index.
+        """
+        unique_sources, source_of_chunk = np.unique(
+            np.asarray([str(source) for source in sources]), return_inverse=True
+        )
+
+        # Split large documents into sections of at most max_group_size chunks
+        order = np.argsort(source_of_chunk, kind="stable")
+        source_starts = np.concatenate(
+            [[0], np.cumsum(np.bincount(source_of_chunk))[:-1]]
+        )
+        rank = np.empty(len(order), dtype=np.int64)
+        rank[order] = np.arange(len(order)) - source_starts[source_of_chunk[order]]
+        section = rank // max(1, max_group_size)
+        num_sections = int(section.max()) + 1 if len(section) else 1
+        keys, doc_of_chunk = np.unique(
+            source_of_chunk.astype(np.int64) * num_sections + section,
+            return_inverse=True,
+        )
+        labels = [
+            str(unique_sources[key // num_sections])
+            + (f"#{key % num_sections}" if key % num_sections else "")
+            for key in keys
+        ]
+        num_docs = len(keys)
+
+        sums = np.zeros((num_docs, index.d), dtype=np.float64)
+        for start in range(0, index.ntotal, _BUILD_BLOCK_SIZE):
+            count = min(_BUILD_BLOCK_SIZE, index.ntotal - start)
+            block = index.reconstruct_n(start, count)
+            # Sum the block's chunks per document in one vectorised pass
+            block_docs = doc_of_chunk[start:start + count]
+            order = np.argsort(block_docs, kind="stable")
+            docs, first = np.unique(block_docs[order], return_index=True)
+            sums[docs] += np.add.reduceat(block[order], first, axis=0)
+
+        counts = np.bincount(doc_of_chunk, minlength=num_docs)
+        centroids = (sums / np.maximum(counts, 1)[:, None]).astype(np.float32)
+
+        positions = np.argsort(doc_of_chunk, kind="stable").astype(np.int64)
+        offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        return cls(labels, centroids, offsets, positions, inner_product)
+
+    @classmethod
+    def from_vector_store(cls, vector_store: FAISS) -> "DocumentIndex":
+        """
+        Build the document index for a vector store.
+
+        Chunks are grouped by source file. Grouping per record instead would
+        leave JSONL and CSV exports with as many document vectors as chunks.
+
+        Args:
+            vector_store: FAISS vector store instance.
+
+        Returns:
+            Document index.
+        """
+        sources = []
+        for i in range(vector_store.index.ntotal):
+            doc = vector_store.docstore.search(vector_store.index_to_docstore_id[i])
+            sources.append(str(getattr(doc, "metadata", {}).get("source", "")))
+        inner_product = (
+            vector_store.distance_strategy == DistanceStrategy.MAX_INNER_PRODUCT
+        )
+        return cls.build(vector_store.index, sources, inner_product)
+
+    def save(self, store_path: str):
+        """
+        Save the document index next to a vector store.
+
+        Args:
+            store_path: Path to the vector store version.
+        """
+        np.savez(
+            os.path.join(store_path, HIERARCHY_FILE),
+            sources=np.asarray(self.sources, dtype=str),
+            centroids=self.centroids,
+            offsets=self.offsets,
+            positions=self.positions,
+            inner_product=np.array(self.inner_product),
+        )
+
+    @classmethod
+    def load(cls, store_path: str):
+        """
+        Load the document index saved with a vector store.
+
+        Args:
+            store_path: Path to the vector store version.
+
+        Returns:
+            The document index, or None if the store has none.
+        """
+        path = os.path.join(store_path, HIERARCHY_FILE)
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as data:
+            return cls(
+                list(data["sources"]),
+                data["centroids"],
+                data["offsets"],
+                data["positions"],
+                bool(data["inner_product"]),
+            )
+
+    def search(
+        self,
+        index: faiss.Index,
+        embedding: np.ndarray,
+        fan_out: int,
+    ) -> np.ndarray:
+        """
+        Rank the chunks of the documents closest to a query.
+
+        Args:
+            index: Chunk-level FAISS index the document index was built from.
+            embedding: Query embedding, shape (1, dim).
+            fan_out: Number of documents whose chunks are scored.
+
+        Returns:
+            Chunk positions in the chunk index, best match first.
+        """
+        fan_out = min(fan_out, self._index.ntotal)
+        _, doc_ids = self._index.search(embedding, fan_out)
+        groups = [
+            self.positions[self.offsets[i]:self.offsets[i + 1]]
+            for i in doc_ids[0] if i != -1
+        ]
+        if not groups:
+            return np.empty(0, dtype=np.int64)
+        candidates = np.concatenate(groups)
+
+        vectors = index.reconstruct_batch(candidates)
+        if self.inner_product:
+            order = np.argsort(-(vectors @ embedding[0]))
+        else:
+            order = np.argsort(((vectors - embedding[0]) ** 2).sum(axis=1))
+        return candidates[order]
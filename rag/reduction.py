@@ -0,0 +1,329 @@
+"""Dimensionality reduction of embeddings."""
+
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+import faiss
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_community.vectorstores import FAISS
+from langchain_community.vectorstores.utils import DistanceStrategy
+
+from rag.config import REDUCTION_SAMPLE_SIZE
+
+PROJECTION_FILE = "projection.npz"
+REDUCTION_METHODS = ("pca", "truncate")
+
+# Upper bound on held-out vectors used to measure recall
+_MAX_EVAL_QUERIES = 200
+
+# Number of vectors projected into the reduced index at a time
+_REDUCE_BLOCK_SIZE = 65536
+
+
+class Projection:
+    """
+    Linear projection from the embedding model's dimension to a smaller one.
+
+    Two methods are supported:
+    - "pca": centre the vectors and project them onto the top principal
+      components fitted on a sample.
+    - "truncate": keep the leading dimensions and re-normalise, for
+      Matryoshka-trained models such as nomic-embed-text v1.5.
+    """
+
+    def __init__(
+        self,
+        method: str,
+        source_dim: int,
+        target_dim: int,
+        mean: Optional[np.ndarray] = None,
+        components: Optional[np.ndarray] = None,
+    ):
+        if method not in REDUCTION_METHODS:
+            raise ValueError(
+                f"Unknown reduction method '{method}', "
+                f"expected one of: {', '.join(REDUCTION_METHODS)}"
+            )
+        if not 0 < target_dim < source_dim:
+            raise ValueError(
+                f"Target dimension {target_dim} must be between 1 and "
+                f"the embedding dimension {source_dim}"
+            )
+        self.method = method
+        self.source_dim = source_dim
+        self.target_dim = target_dim
+        self.mean = mean
+        self.components = components
+
+    @classmethod
+    def fit(cls, vectors: np.ndarray, method: str, target_dim: int) -> "Projection":
+        """
+        Fit a projection on a sample of embedding vectors.
+
+        Args:
+            vectors: Sample of embeddings, one per row.
+            method: Reduction method, "pca" or "truncate".
+            target_dim: Dimension to reduce to.
+
+        Returns:
+            Fitted projection.
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        projection = cls(method, vectors.shape[1], target_dim)
+        if method == "pca":
+            if len(vectors) < target_dim:
+                raise ValueError(
+                    f"PCA to {target_dim} dimensions needs at least {target_dim} "
+                    f"sample vectors, got {len(vectors)}"
+                )
+            mean = vectors.mean(axis=0)
+            # Rows of vt are the principal axes, largest variance first
+            _, _, vt = np.linalg.svd(vectors - mean, full_matrices=False)
+            projection.mean = mean.astype(np.float32)
+            projection.components = np.ascontiguousarray(
+                vt[:target_dim].T, dtype=np.float32
+            )
+        return projection
+
+    def apply(self, vectors: np.ndarray) -> np.ndarray:
+        """
+        Project embedding vectors to the target dimension.
+
+        Args:
+            vectors: Embeddings, one per row.
+
+        Returns:
+            Reduced embeddings as a float32 array.
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.shape[1] != self.source_dim:
+            raise ValueError(
+                f"Projection expects {self.source_dim}-dimensional embeddings, "
+                f"got {vectors.shape[1]}. Was the index built with another model?"
+            )
+        if self.method == "pca":
+            return (vectors - self.mean) @ self.components
+
+        reduced = np.ascontiguousarray(vectors[:, :self.target_dim])
+        faiss.normalize_L2(reduced)
+        return reduced
+
+    def save(self, store_path: str):
+        """
+        Save the projection next to a vector store.
+
+        Args:
+            store_path: Path to the vector store.
+        """
+        arrays = {
+            "method": np.array(self.method),
+            "source_dim": np.array(self.source_dim),
+            "target_dim": np.array(self.target_dim),
+        }
+        if self.method == "pca":
+            arrays["mean"] = self.mean
+            arrays["components"] = self.components
+        np.savez(os.path.join(store_path, PROJECTION_FILE), **arrays)
+
+    @classmethod
+    def load(cls, store_path: str) -> Optional["Projection"]:
+        """
+        Load the projection saved with a vector store.
+
+        Args:
+            store_path: Path to the vector store.
+
+        Returns:
+            The projection, or None if the store is not reduced.
+        """
+        path = os.path.join(store_path, PROJECTION_FILE)
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as data:
+            return cls(
+                str(data["method"]),
+                int(data["source_dim"]),
+                int(data["target_dim"]),
+                mean=data["mean"] if "mean" in data else None,
+                components=data["components"] if "components" in data else None,
+            )
+
+
+class ProjectedEmbeddings(Embeddings):
+    """Embedding model wrapper that applies a projection to every vector."""
+
+    def __init__(self, embeddings: Embeddings, projection: Projection):
+        self.embeddings = embeddings
+        self.projection = projection
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        vectors = self.embeddings.embed_documents(texts)
+        return self.projection.apply(vectors).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        vector = self.embeddings.embed_query(text)
+        return self.projection.apply([vector])[0].tolist()
+
+
+def evaluate_projection(
+    vectors: np.ndarray,
+    queries: np.ndarray,
+    projection: Projection,
+    k: int,
+) -> Dict:
+    """
+    Compare flat search on full and reduced vectors.
+
+    The queries must be held out from the searched vectors and from the
+    sample the projection was fitted on, so that no query finds itself.
+
+    Args:
+        vectors: Full-dimensional embeddings to search, one per row.
+        queries: Held-out full-dimensional embeddings used as queries.
+        projection: Fitted projection.
+        k: Number of neighbours to compare.
+
+    Returns:
+        Dictionary with full_ms, reduced_ms, speedup, recall, k and
+        num_queries entries.
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    queries = np.asarray(queries, dtype=np.float32)
+    reduced = projection.apply(vectors)
+    reduced_queries = projection.apply(queries)
+    k = min(k, len(vectors))
+
+    full_index = faiss.IndexFlatL2(vectors.shape[1])
+    full_index.add(vectors)
+    reduced_index = faiss.IndexFlatL2(reduced.shape[1])
+    reduced_index.add(reduced)
+
+    start_time = time.perf_counter()
+    _, full_ids = full_index.search(queries, k)
+    full_time = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    _, reduced_ids = reduced_index.search(reduced_queries, k)
+    reduced_time = time.perf_counter() - start_time
+
+    hits = sum(
+        len(set(full_row) & set(reduced_row))
+        for full_row, reduced_row in zip(full_ids, reduced_ids)
+    )
+    return {
+        "full_ms": full_time * 1000,
+        "reduced_ms": reduced_time * 1000,
+        "speedup": full_time / reduced_time if reduced_time else float("inf"),
+        "recall": hits / (len(queries) * k),
+        "k": k,
+        "num_queries": len(queries),
+    }
+
+
+def reduce_vector_store(
+    vector_store: FAISS,
+    method: str,
+    target_dim: int,
+    k: int,
+    sample_size: int = REDUCTION_SAMPLE_SIZE,
+) -> Optional[Tuple[Projection, Dict]]:
+    """
+    Replace a vector store's index with a reduced-dimension one.
+
+    The projection is fitted on a strided sample spread over the whole
+    index, so it is not biased towards the first files loaded. Part of the
+    sample is held out to measure recall. If there are too few vectors to
+    fit the projection, the full-dimension index is kept.
+
+    Args:
+        vector_store: FAISS vector store instance with full-dimension vectors.
+        method: Reduction method, "pca" or "truncate".
+        target_dim: Dimension to reduce to.
+        k: Number of neighbours used to measure recall.
+        sample_size: Number of vectors sampled to fit and evaluate.
+
+    Returns:
+        The projection and its evaluation, or None if the index was kept.
+    """
+    index = vector_store.index
+    if not 0 < target_dim < index.d:
+        print(
+            f"Target dimension {target_dim} must be between 1 and the "
+            f"embedding dimension {index.d}; keeping full-dimension vectors"
+        )
+        return None
+
+    # Strided sample across the index, split into fit and held-out parts
+    num_samples = min(sample_size, index.ntotal)
+    sample_positions = np.unique(
+        np.linspace(0, index.ntotal - 1, num_samples).astype(np.int64)
+    )
+    sample = index.reconstruct_batch(sample_positions)
+    # About a tenth of the sample, up to a limit, is held out as queries,
+    # spread evenly across it
+    num_queries = min(_MAX_EVAL_QUERIES, len(sample) // 10)
+    held_out = np.zeros(len(sample), dtype=bool)
+    if num_queries:
+        held_out[np.linspace(0, len(sample) - 1, num_queries).astype(np.int64)] = True
+    queries, fit_sample = sample[held_out], sample[~held_out]
+
+    min_vectors = target_dim if method == "pca" else 1
+    if len(fit_sample) < min_vectors or num_queries == 0:
+        print(
+            f"Only {index.ntotal} vectors indexed, too few to fit and evaluate a "
+            f"{target_dim}-dimension {method} projection; "
+            f"keeping full-dimension vectors"
+        )
+        return None
+
+    projection = Projection.fit(fit_sample, method, target_dim)
+    evaluation = evaluate_projection(fit_sample, queries, projection, k)
+
+    # Project every stored vector into a new index of the same type
+    if vector_store.distance_strategy == DistanceStrategy.MAX_INNER_PRODUCT:
+        reduced_index = faiss.IndexFlatIP(target_dim)
+    else:
+        reduced_index = faiss.IndexFlatL2(target_dim)
+    for start in range(0, index.ntotal, _REDUCE_BLOCK_SIZE):
+        count = min(_REDUCE_BLOCK_SIZE, index.ntotal - start)
+        reduced_index.add(projection.apply(index.reconstruct_n(start, count)))
+
+    vector_store.index = reduced_index
+    vector_store.embedding_function = ProjectedEmbeddings(
+        vector_store.embedding_function, projection
+    )
+    return projection, evaluation
+
+
+def print_reduction_report(projection: Projection, count: int, evaluation: Dict):
+    """
+    Print the memory saved, search speedup and recall@k of a projection.
+
+    Args:
+        projection: Fitted projection.
+        count: Number of vectors in the index.
+        evaluation: Result of evaluate_projection.
+    """
+    full_bytes = count * projection.source_dim * 4
+    reduced_bytes = count * projection.target_dim * 4
+    saved = full_bytes - reduced_bytes
+    print(
+        f"Reduced embeddings from {projection.source_dim} to "
+        f"{projection.target_dim} dimensions ({projection.method})"
+    )
+    print(
+        f"Vector memory: {full_bytes / (1024 * 1024):.2f} MB -> "
+        f"{reduced_bytes / (1024 * 1024):.2f} MB "
+        f"(saved {saved / (1024 * 1024):.2f} MB, {saved / full_bytes:.1%})"
+    )
+    print(
+        f"Search on sample: {evaluation['full_ms']:.2f} ms -> "
+        f"{evaluation['reduced_ms']:.2f} ms ({evaluation['speedup']:.1f}x speedup)"
+    )
+    print(
+        f"Recall@{evaluation['k']} vs full dimension on "
+        f"{evaluation['num_queries']} held-out vectors: "
+        f"{evaluation['recall']:.1%} "
+        f"(change {evaluation['recall'] - 1:+.1%})"
+    )
@@ -0,0 +1,119 @@
+"""Hot reloading of the vector store for long-running query processes."""
+
+import os
+import threading
+from typing import Optional
+from langchain_community.vectorstores import FAISS
+
+from rag.config import VECTOR_STORE_PATH, SNAPSHOT_POLL_INTERVAL
+from rag.embeddings import get_embeddings, load_vector_store
+from rag.snapshots import current_version, version_path
+from rag.tombstones import load_tombstones, tombstones_path
+
+
+def _mtime(path: str) -> Optional[float]:
+    """Get the modification time of a file, or None if it does not exist."""
+    try:
+        return os.stat(path).st_mtime
+    except FileNotFoundError:
+        return None
+
+
+class HotReloadingVectorStore:
+    """
+    Vector store handle that follows the store's "current" version.
+
+    A background thread polls the version pointer. When it changes, the new
+    version is loaded while the old one keeps serving queries, and the two
+    are then swapped. Callers should fetch the store with get() once per
+    request, so a request started on the old version finishes on it and
+    the old version is released once no request holds it.
+    """
+
+    def __init__(
+        self,
+        store_path: str = VECTOR_STORE_PATH,
+        poll_interval: float = SNAPSHOT_POLL_INTERVAL,
+    ):
+        self.store_path = store_path
+        self.poll_interval = poll_interval
+        # Loaded once and shared by every version
+        self._embeddings = get_embeddings()
+        self._version = current_version(store_path)
+        self._vector_store = load_vector_store(store_path, self._embeddings)
+        self._tombstones_mtime = _mtime(
+            tombstones_path(self._vector_store.store_dir)
+        )
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def version(self) -> Optional[str]:
+        """Name of the version being served, or None for unversioned stores."""
+        return self._version
+
+    def get(self) -> FAISS:
+        """
+        Get the vector store to use for a request.
+
+        Returns:
+            FAISS vector store instance.
+        """
+        return self._vector_store
+
+    def check_for_update(self) -> bool:
+        """
+        Load and swap in a new version if "current" has moved.
+
+        Tombstones added to the served version are picked up as well.
+
+        Returns:
+            True if a new version was swapped in.
+        """
+        version = current_version(self.store_path)
+        if version is None or version == self._version:
+            self._refresh_tombstones()
+            return False
+
+        try:
+            vector_store = load_vector_store(
+                version_path(self.store_path, version),
+                self._embeddings,
+            )
+        except Exception as e:
+            # Keep serving the old version and retry on the next poll
+            print(f"Failed to load vector store version {version}: {e}")
+            return False
+
+        # A single reference assignment, so readers see old or new, never neither
+        self._vector_store = vector_store
+        self._version = version
+        self._tombstones_mtime = _mtime(tombstones_path(vector_store.store_dir))
+        print(f"Switched to vector store version {version}")
+        return True
+
+    def _refresh_tombstones(self):
+        """Reload the tombstones of the served version if they changed."""
+        store_dir = self._vector_store.store_dir
+        mtime = _mtime(tombstones_path(store_dir))
+        if mtime != self._tombstones_mtime:
+            self._vector_store.tombstones = load_tombstones(store_dir)
+            self._tombstones_mtime = mtime
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_interval):
+            self.check_for_update()
+
+    def start(self):
+        """Start polling for new versions in the background."""
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._watch, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop polling for new versions."""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
@@ -1,10 +1,12 @@
 """Document retrieval utilities."""
 
-from typing import List
+from typing import List, Set
+import faiss
+import numpy as np
 from langchain.schema import Document
 from langchain_community.vectorstores import FAISS
 
-from rag.config import TOP_K_RETRIEVAL
+from rag.config import TOP_K_RETRIEVAL, COARSE_FAN_OUT
 
 
 def get_retriever(vector_store: FAISS):
@@ -24,19 +26,110 @@ def get_retriever(vector_store: FAISS):
     return retriever
 
 
-def retrieve_documents(vector_store: FAISS, query: str) -> List[Document]:
+def _embed_query(vector_store: FAISS, query: str) -> np.ndarray:
+    """Embed a query the same way the vector store embeds its searches."""
+    embedding = np.array([vector_store._embed_query(query)], dtype=np.float32)
+    if vector_store._normalize_L2:
+        faiss.normalize_L2(embedding)
+    return embedding
+
+
+def _search_coarse_to_fine(
+    vector_store: FAISS,
+    query: str,
+    k: int,
+    fan_out: int,
+    tombstones: Set[str],
+) -> List[Document]:
+    """
+    Search the document index first, then only the chunks of its top hits.
+
+    If deleted chunks leave fewer than k live results, the fan-out doubles
+    until k are found or every document has been searched.
+    """
+    embedding = _embed_query(vector_store, query)
+    document_index = vector_store.document_index
+    num_documents = len(document_index.sources)
+
+    while True:
+        positions = document_index.search(vector_store.index, embedding, fan_out)
+        documents = []
+        for i in positions:
+            doc_id = vector_store.index_to_docstore_id[int(i)]
+            if doc_id in tombstones:
+                continue
+            documents.append(vector_store.docstore.search(doc_id))
+            if len(documents) == k:
+                return documents
+        if fan_out >= num_documents:
+            return documents
+        fan_out = min(2 * fan_out, num_documents)
+
+
+def _search_live(
+    vector_store: FAISS,
+    query: str,
+    k: int,
+    tombstones: Set[str],
+) -> List[Document]:
+    """
+    Search the index, skipping tombstoned documents.
+
+    The search width starts at twice k and doubles only while deleted
+    entries crowd out live ones, so the extra cost stays small.
+    """
+    embedding = _embed_query(vector_store, query)
+    total = vector_store.index.ntotal
+    fetch_k = min(2 * k, total)
+    while True:
+        _, indices = vector_store.index.search(embedding, fetch_k)
+        documents = []
+        for i in indices[0]:
+            if i == -1:
+                continue
+            doc_id = vector_store.index_to_docstore_id[i]
+            if doc_id in tombstones:
+                continue
+            documents.append(vector_store.docstore.search(doc_id))
+            if len(documents) == k:
+                return documents
+        if fetch_k >= total:
+            return documents
+        fetch_k = min(2 * fetch_k, total)
+
+
+def retrieve_documents(
+    vector_store: FAISS,
+    query: str,
+    fan_out: int = COARSE_FAN_OUT,
+) -> List[Document]:
     """
     Retrieve relevant documents for a query.
     
+    Documents marked as deleted are filtered out. With a fan-out width, the
+    closest source documents are found first and only their chunks are
+    searched; otherwise every chunk is searched.
+    
     Args:
         vector_store: FAISS vector store instance.
         query: Query string.
+        fan_out: Number of source documents to search the chunks of,
+            or 0 to search all chunks.
         
     Returns:
         List of retrieved documents.
     """
-    retriever = get_retriever(vector_store)
-    documents = retriever.get_relevant_documents(query)
+    tombstones = getattr(vector_store, "tombstones", None)
+    document_index = getattr(vector_store, "document_index", None)
+    if fan_out > 0 and document_index is not None:
+        documents = _search_coarse_to_fine(
+            vector_store, query, TOP_K_RETRIEVAL, fan_out, tombstones or set()
+        )
+    elif tombstones:
+        documents = _search_live(vector_store, query, TOP_K_RETRIEVAL, tombstones)
+    else:
+        retriever = get_retriever(vector_store)
+        documents = retriever.get_relevant_documents(query)
     
     print(f"Retrieved {len(documents)} documents for query: {query}")
     return documents
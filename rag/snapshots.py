@@ -0,0 +1,187 @@
+"""Versioned snapshots of the vector store."""
+
+import os
+import shutil
+from datetime import datetime
+from typing import Callable, List, Optional
+
+from rag.config import VECTOR_STORE_PATH, SNAPSHOT_RETENTION
+
+CURRENT_FILE = "CURRENT"
+VERSIONS_DIR = "versions"
+
+
+def current_version(store_path: str = VECTOR_STORE_PATH) -> Optional[str]:
+    """
+    Get the name of the version the "current" pointer refers to.
+
+    Args:
+        store_path: Path to the vector store.
+
+    Returns:
+        Version name, or None if the store is not versioned.
+    """
+    path = os.path.join(store_path, CURRENT_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read().strip() or None
+
+
+def version_path(store_path: str, version: str) -> str:
+    """Get the directory of a version."""
+    return os.path.join(store_path, VERSIONS_DIR, version)
+
+
+def resolve_store_path(store_path: str = VECTOR_STORE_PATH) -> str:
+    """
+    Get the directory holding the index files of the current version.
+
+    Stores written before versioning keep their files at the top level
+    and resolve to themselves, as do version directories.
+
+    Args:
+        store_path: Path to the vector store.
+
+    Returns:
+        Directory to load the index from.
+    """
+    version = current_version(store_path)
+    if version is None:
+        return store_path
+    return version_path(store_path, version)
+
+
+def list_versions(store_path: str = VECTOR_STORE_PATH) -> List[str]:
+    """
+    List the versions of a vector store, oldest first.
+
+    Args:
+        store_path: Path to the vector store.
+
+    Returns:
+        List of version names.
+    """
+    versions_dir = os.path.join(store_path, VERSIONS_DIR)
+    if not os.path.isdir(versions_dir):
+        return []
+    return sorted(
+        name for name in os.listdir(versions_dir)
+        if os.path.isdir(os.path.join(versions_dir, name))
+    )
+
+
+def _new_version_path(store_path: str) -> str:
+    """Create a new, empty version directory named after the current time."""
+    versions_dir = os.path.join(store_path, VERSIONS_DIR)
+    os.makedirs(versions_dir, exist_ok=True)
+    while True:
+        version = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        path = os.path.join(versions_dir, version)
+        try:
+            os.makedirs(path)
+            return path
+        except FileExistsError:
+            continue
+
+
+def set_current_version(store_path: str, version: str):
+    """
+    Atomically point "current" at a version.
+
+    The pointer is written to a temporary file and renamed over the old
+    one, so readers see either the old or the new version, never neither.
+
+    Args:
+        store_path: Path to the vector store.
+        version: Version name.
+    """
+    if not os.path.isdir(version_path(store_path, version)):
+        raise FileNotFoundError(f"Version not found: {version}")
+
+    path = os.path.join(store_path, CURRENT_FILE)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(version)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def prune_versions(store_path: str = VECTOR_STORE_PATH, keep: int = SNAPSHOT_RETENTION):
+    """
+    Remove all but the newest versions. The current version is always kept.
+
+    Args:
+        store_path: Path to the vector store.
+        keep: Number of versions to retain.
+    """
+    current = current_version(store_path)
+    versions = list_versions(store_path)
+    for version in versions[:max(len(versions) - keep, 0)]:
+        if version != current:
+            shutil.rmtree(version_path(store_path, version), ignore_errors=True)
+
+
+def save_version(
+    vector_store,
+    store_path: str = VECTOR_STORE_PATH,
+    write_extra: Optional[Callable[[str], None]] = None,
+    keep: int = SNAPSHOT_RETENTION,
+    expected_current: Optional[str] = None,
+) -> Optional[str]:
+    """
+    Save a vector store as a new version and make it current.
+
+    Args:
+        vector_store: FAISS vector store instance.
+        store_path: Path to the vector store.
+        write_extra: Called with the version directory to write extra files
+            before the version is published.
+        keep: Number of versions to retain.
+        expected_current: Directory the store must still resolve to for the
+            new version to be published, for writers that derive the new
+            version from the current one.
+
+    Returns:
+        Directory of the new version, or None if the current version changed
+        from expected_current and nothing was published.
+    """
+    path = _new_version_path(store_path)
+    vector_store.save_local(path)
+    if write_extra is not None:
+        write_extra(path)
+
+    if expected_current is not None and os.path.normpath(
+        resolve_store_path(store_path)
+    ) != os.path.normpath(expected_current):
+        shutil.rmtree(path, ignore_errors=True)
+        return None
+
+    set_current_version(store_path, os.path.basename(path))
+    prune_versions(store_path, keep)
+    return path
+
+
+def rollback(store_path: str = VECTOR_STORE_PATH, version: Optional[str] = None) -> str:
+    """
+    Point "current" back at an earlier version.
+
+    Args:
+        store_path: Path to the vector store.
+        version: Version to roll back to; defaults to the one before current.
+
+    Returns:
+        Name of the version now current.
+    """
+    if version is None:
+        versions = list_versions(store_path)
+        current = current_version(store_path)
+        older = [v for v in versions if current is None or v < current]
+        if not older:
+            raise ValueError("No earlier version to roll back to")
+        version = older[-1]
+
+    set_current_version(store_path, version)
+    print(f"Rolled back vector store to version {version}")
+    return version
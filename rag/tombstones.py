@@ -0,0 +1,272 @@
+"""Deletion tombstones and compaction for the vector store."""
+
+import json
+import os
+import shutil
+from typing import Dict, Iterable, List, Set
+from langchain_community.vectorstores import FAISS
+
+from rag.config import VECTOR_STORE_PATH, COMPACTION_THRESHOLD
+from rag.hierarchy import DocumentIndex
+from rag.reduction import PROJECTION_FILE
+from rag.snapshots import resolve_store_path, save_version
+
+TOMBSTONES_FILE = "tombstones.json"
+
+
+def tombstones_path(store_path: str = VECTOR_STORE_PATH) -> str:
+    """Get the path of the tombstones file of the current version."""
+    return os.path.join(resolve_store_path(store_path), TOMBSTONES_FILE)
+
+
+def load_tombstones(store_path: str = VECTOR_STORE_PATH) -> Set[str]:
+    """
+    Load the set of deleted docstore IDs for a vector store.
+
+    Args:
+        store_path: Path to the vector store.
+
+    Returns:
+        Set of tombstoned docstore IDs.
+    """
+    path = tombstones_path(store_path)
+    if not os.path.exists(path):
+        return set()
+    with open(path, "r", encoding="utf-8") as f:
+        return set(json.load(f))
+
+
+def save_tombstones(tombstones: Set[str], store_path: str = VECTOR_STORE_PATH):
+    """
+    Save the set of deleted docstore IDs for a vector store.
+
+    The file is written to a temporary path and renamed so that readers
+    never see a partial write.
+
+    Args:
+        tombstones: Set of tombstoned docstore IDs.
+        store_path: Path to the vector store.
+    """
+    path = tombstones_path(store_path)
+    if not tombstones:
+        if os.path.exists(path):
+            os.remove(path)
+        return
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(sorted(tombstones), f)
+    os.replace(tmp_path, path)
+
+
+def _store_dir(vector_store: FAISS, store_path: str) -> str:
+    """
+    Get the version directory a vector store was loaded from or saved to.
+
+    Falls back to the current version for stores without a recorded one.
+    """
+    store_dir = getattr(vector_store, "store_dir", None)
+    return store_dir or resolve_store_path(store_path)
+
+
+def _is_current(store_dir: str, store_path: str) -> bool:
+    """Check whether a version directory is still the store's current one."""
+    return os.path.normpath(store_dir) == os.path.normpath(
+        resolve_store_path(store_path)
+    )
+
+
+def _get_tombstones(vector_store: FAISS) -> Set[str]:
+    """Get the tombstone set attached to a vector store, creating it if needed."""
+    if getattr(vector_store, "tombstones", None) is None:
+        vector_store.tombstones = set()
+    return vector_store.tombstones
+
+
+def delete_by_ids(
+    vector_store: FAISS,
+    ids: Iterable[str],
+    store_path: str = VECTOR_STORE_PATH,
+) -> int:
+    """
+    Mark documents as deleted by docstore ID.
+
+    Args:
+        vector_store: FAISS vector store instance.
+        ids: Docstore IDs to delete.
+        store_path: Path to the vector store.
+
+    Returns:
+        Number of newly tombstoned documents.
+    """
+    tombstones = _get_tombstones(vector_store)
+    live_ids = set(vector_store.index_to_docstore_id.values())
+    new_ids = {doc_id for doc_id in ids if doc_id in live_ids} - tombstones
+
+    if new_ids:
+        tombstones.update(new_ids)
+        # Written to the loaded version, whose IDs these are
+        store_dir = _store_dir(vector_store, store_path)
+        save_tombstones(tombstones, store_dir)
+        if not _is_current(store_dir, store_path):
+            print(
+                f"Warning: a newer version was published since {store_dir} was "
+                "loaded; these deletes do not apply to it"
+            )
+
+    print(f"Marked {len(new_ids)} documents as deleted")
+    return len(new_ids)
+
+
+def find_ids_by_source(vector_store: FAISS, source: str) -> List[str]:
+    """
+    Find the docstore IDs of all chunks loaded from a source file.
+
+    Args:
+        vector_store: FAISS vector store instance.
+        source: Source path, as stored in the document metadata.
+
+    Returns:
+        List of matching docstore IDs.
+    """
+    source = os.path.normpath(source)
+    ids = []
+    for doc_id in vector_store.index_to_docstore_id.values():
+        doc = vector_store.docstore.search(doc_id)
+        doc_source = getattr(doc, "metadata", {}).get("source")
+        if doc_source and os.path.normpath(doc_source) == source:
+            ids.append(doc_id)
+    return ids
+
+
+def delete_by_source(
+    vector_store: FAISS,
+    source: str,
+    store_path: str = VECTOR_STORE_PATH,
+) -> int:
+    """
+    Mark all chunks loaded from a source file as deleted.
+
+    Args:
+        vector_store: FAISS vector store instance.
+        source: Source path, as stored in the document metadata.
+        store_path: Path to the vector store.
+
+    Returns:
+        Number of newly tombstoned documents.
+    """
+    ids = find_ids_by_source(vector_store, source)
+    if not ids:
+        print(f"No documents found for source: {source}")
+        return 0
+    return delete_by_ids(vector_store, ids, store_path)
+
+
+def _directory_size(path: str) -> int:
+    """Get the total size in bytes of the files in a directory."""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+    return total
+
+
+def index_stats(vector_store: FAISS, store_path: str = VECTOR_STORE_PATH) -> Dict:
+    """
+    Get the live, dead and on-disk sizes of a vector store.
+
+    Args:
+        vector_store: FAISS vector store instance.
+        store_path: Path to the vector store.
+
+    Returns:
+        Dictionary with live, dead, total, dead_ratio and disk_bytes entries.
+    """
+    store_path = _store_dir(vector_store, store_path)
+    total = vector_store.index.ntotal
+    dead = len(_get_tombstones(vector_store))
+    return {
+        "live": total - dead,
+        "dead": dead,
+        "total": total,
+        "dead_ratio": dead / total if total else 0.0,
+        "disk_bytes": _directory_size(store_path) if os.path.exists(store_path) else 0,
+    }
+
+
+def compact_vector_store(
+    vector_store: FAISS,
+    store_path: str = VECTOR_STORE_PATH,
+    threshold: float = COMPACTION_THRESHOLD,
+    force: bool = False,
+) -> bool:
+    """
+    Remove tombstoned documents from the index and docstore.
+
+    Compaction only runs once the ratio of dead to total entries reaches
+    the threshold, unless forced. The compacted index is saved as a new
+    version of the store. It is only published if the store was loaded from
+    the current version, and deletes written to that version by other
+    processes since it was loaded are applied as well.
+
+    Args:
+        vector_store: FAISS vector store instance.
+        store_path: Path to the vector store.
+        threshold: Dead-entry ratio at which compaction runs.
+        force: Compact regardless of the threshold.
+
+    Returns:
+        True if the vector store was compacted.
+    """
+    store_dir = _store_dir(vector_store, store_path)
+    if not _is_current(store_dir, store_path):
+        print(
+            f"A newer version was published since {store_dir} was loaded; "
+            "reload the store before compacting"
+        )
+        return False
+
+    # Pick up deletes made by other processes since the store was loaded
+    tombstones = _get_tombstones(vector_store)
+    live_ids = set(vector_store.index_to_docstore_id.values())
+    tombstones.update(load_tombstones(store_dir) & live_ids)
+    stats = index_stats(vector_store, store_path)
+
+    if not tombstones:
+        print("Nothing to compact")
+        return False
+    if not force and stats["dead_ratio"] < threshold:
+        print(
+            f"Dead ratio {stats['dead_ratio']:.1%} is below the "
+            f"compaction threshold of {threshold:.1%}"
+        )
+        return False
+
+    # Rewrites the index and docstore without the deleted entries
+    vector_store.delete(list(tombstones))
+
+    # Chunk positions have changed, so the document index is rebuilt
+    vector_store.document_index = DocumentIndex.from_vector_store(vector_store)
+
+    # The new version keeps the projection of the one it replaces
+    projection_path = os.path.join(store_dir, PROJECTION_FILE)
+
+    def write_extra(path: str):
+        vector_store.document_index.save(path)
+        if os.path.exists(projection_path):
+            shutil.copy2(projection_path, path)
+
+    path = save_version(
+        vector_store, store_path, write_extra=write_extra, expected_current=store_dir
+    )
+    if path is None:
+        print(
+            f"A newer version was published while compacting {store_dir}; "
+            "the compacted index was discarded, reload the store and retry"
+        )
+        return False
+    vector_store.store_dir = path
+    tombstones.clear()
+
+    print(f"Compacted vector store: removed {stats['dead']} documents")
+    return True